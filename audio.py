@@ -0,0 +1,146 @@
+from os import environ
+from array import array
+from math import sin, pi
+from random import Random
+from pygame import mixer, error
+
+
+class Audio(object):
+    """
+    Sound effects, synthesized and decoded once at load.
+
+    The mixer is opened with a small buffer so that the output latency stays
+    under `MAX_LATENCY` milliseconds, and every effect class plays on its own
+    reserved channel, so a new shot never waits for a free channel or cuts
+    the march. The picture side of the latency depends on the engine mode,
+    run this module to measure both in each of them.
+    """
+    MAX_LATENCY = 20  # milliseconds
+    FREQUENCY = 22050
+
+    MARCH = 0
+    SHOT = 1
+    EXPLOSION = 2
+    EFFECTS = 3
+
+    def __init__(self, frequency: int = FREQUENCY, max_latency: int = MAX_LATENCY):
+        self.enabled = False
+        self.frequency = frequency
+        """ Largest power of two buffer that fits in the latency bound """
+        self.buffer = 1 << ((frequency * max_latency // 1000).bit_length() - 1)
+        self.__note = 0
+        try:
+            mixer.quit()
+            mixer.init(frequency, -16, 1, self.buffer)
+        except error:
+            return
+        self.frequency, _, self.channels = mixer.get_init()
+        mixer.set_reserved(self.EFFECTS)
+        self.__channels = [mixer.Channel(effect) for effect in range(self.EFFECTS)]
+        self.__march = [self.__sound(self.__square(note, 0.09)) for note in (98, 87, 78, 73)]
+        self.__sounds = {
+            self.SHOT: self.__sound(self.__sweep(1200, 300, 0.15)),
+            self.EXPLOSION: self.__sound(self.__noise(0.25)),
+        }
+        self.enabled = True
+
+    def step(self) -> None:
+        """ Play the next note of the march, one per formation step """
+        if self.enabled is False:
+            return
+        self.__trigger(self.MARCH, self.__march[self.__note])
+        self.__note = (self.__note + 1) % len(self.__march)
+
+    def play(self, effect: int) -> None:
+        if self.enabled is False:
+            return
+        self.__trigger(effect, self.__sounds[effect])
+
+    def latency(self, shown: float) -> float:
+        """
+        Bound on how far a sound and the frame showing its cause drift
+        apart, in milliseconds: `shown`, the time from triggering the sound
+        to that frame being on screen (see `SdlRenderer.delay`), plus one
+        mixer buffer.
+
+        The buffer is the size requested from the mixer; pygame does not
+        report the one SDL granted, so a driver that rounds it up makes the
+        real latency larger than this.
+        """
+        return shown + self.buffer * 1000 / self.frequency
+
+    def __trigger(self, effect: int, sound: mixer.Sound) -> None:
+        self.__channels[effect].play(sound)
+
+    def __sound(self, samples: array) -> mixer.Sound:
+        if self.channels > 1:
+            frames = array('h', bytes(len(samples) * 2 * self.channels))
+            for channel in range(self.channels):
+                frames[channel::self.channels] = samples
+            samples = frames
+        return mixer.Sound(buffer=samples)
+
+    def __square(self, pitch: float, duration: float) -> array:
+        count = int(self.frequency * duration)
+        period = self.frequency / pitch
+        return array('h', (
+            int((6000 if (i % period) < period / 2 else -6000) * (1 - i / count))
+            for i in range(count)
+        ))
+
+    def __sweep(self, start: float, end: float, duration: float) -> array:
+        count = int(self.frequency * duration)
+        phase = 0.0
+        samples = array('h', bytes(count * 2))
+        for i in range(count):
+            phase += (start + (end - start) * i / count) / self.frequency
+            samples[i] = int(4000 * sin(2 * pi * phase) * (1 - i / count))
+        return samples
+
+    def __noise(self, duration: float) -> array:
+        count = int(self.frequency * duration)
+        rnd = Random(0)
+        return array('h', (
+            int(rnd.uniform(-8000, 8000) * (1 - i / count) ** 2)
+            for i in range(count)
+        ))
+
+
+def main():
+    """
+    Play a few seconds headless in every engine mode and check the
+    audio-to-visual latency of the march notes against the bound.
+    """
+    environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    from pygame.time import set_timer
+    from engine import Engine
+    from renderer import SdlRenderer
+    from game import PlayState
+    from sprites import Ship
+    from manifest import SPRITES
+
+    failures = []
+    for name, pipelined, interpolated in (('serial', False, False), ('pipelined', True, False), ('smooth', False, True)):
+        renderer = SdlRenderer(224, 260, 672, 780)
+        renderer.register_image(Ship.SPRITE, SPRITES.image, (0, 0, 0), False)
+        audio = Audio()
+        if audio.enabled is False:
+            raise SystemExit("FAIL: the mixer could not be opened")
+        set_timer(pygame.QUIT, 3500, 1)
+        Engine(renderer, pipelined, interpolated=interpolated).run(PlayState(renderer, None, audio))
+        latency = audio.latency(renderer.delay)
+        print("%-10s shown %6.2f ms  latency %6.2f ms (bound %d ms)" % (
+            name, renderer.delay, latency, Audio.MAX_LATENCY))
+        if latency > Audio.MAX_LATENCY:
+            failures.append(name)
+    for name in failures:
+        print("FAIL: %s latency above the bound" % name)
+    if failures:
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import zlib
+from struct import Struct
+from queue import Queue, Empty
+from threading import Thread
+from typing import Optional, Iterator
+from pygame import Surface
+
+HEADER = Struct('<5sHHHBB')  # magic, width, height, pitch, bytes per pixel, level
+FRAME = Struct('<I')  # length of the frame data that follows
+
+MAGIC = b'SICAP'
+
+
+class Capture(object):
+    """
+    Records the backbuffer into a file of raw or zlib compressed frames.
+
+    Every grab copies the pixels straight from the surface buffer into one
+    slot of a preallocated ring; a background worker compresses and writes
+    the filled slots and hands them back. When the ring is full the frame is
+    either dropped (and counted) or the caller waits for a free slot.
+    """
+    DROP = 'drop'
+    BLOCK = 'block'
+
+    def __init__(self, path: str, slots: int = 32, backpressure: str = DROP, level: int = 0):
+        """
+        Parameters
+        ----------
+        path : str
+            The file to write the frames to.
+        slots : int
+            Number of preallocated frames in the ring.
+        backpressure : str
+            `Capture.DROP` or `Capture.BLOCK` when the ring is full.
+        level : int
+            zlib compression level, 0 writes raw frames.
+        """
+        self.path = path
+        self.slots = slots
+        self.backpressure = backpressure
+        self.level = level
+        self.frames: int = 0
+        self.dropped: int = 0
+        self.__free: Queue = Queue()
+        self.__filled: Queue = Queue()
+        self.__worker: Optional[Thread] = None
+
+    def grab(self, surface: Surface) -> None:
+        if self.__worker is None:
+            self.__start(surface)
+        try:
+            slot = self.__free.get(self.backpressure == self.BLOCK)
+        except Empty:
+            self.dropped += 1
+            return
+        view = memoryview(surface.get_buffer())
+        slot[:] = view
+        view.release()
+        self.__filled.put(slot)
+        self.frames += 1
+
+    def close(self) -> None:
+        if self.__worker is None:
+            return
+        self.__filled.put(None)
+        self.__worker.join()
+        self.__worker = None
+
+    def __start(self, surface: Surface) -> None:
+        width, height = surface.get_size()
+        pitch = surface.get_pitch()
+        for _ in range(self.slots):
+            self.__free.put(bytearray(pitch * height))
+        header = HEADER.pack(MAGIC, width, height, pitch, surface.get_bytesize(), self.level)
+        self.__worker = Thread(target=self.__run, args=(header,), name='capture', daemon=True)
+        self.__worker.start()
+
+    def __run(self, header: bytes) -> None:
+        with open(self.path, 'wb') as output:
+            output.write(header)
+            while True:
+                slot = self.__filled.get()
+                if slot is None:
+                    break
+                data = slot if self.level == 0 else zlib.compress(slot, self.level)
+                output.write(FRAME.pack(len(data)))
+                output.write(data)
+                self.__free.put(slot)
+
+
+def read(path: str) -> Iterator[bytes]:
+    """ Yield the raw pixels of every frame of a capture file """
+    with open(path, 'rb') as source:
+        magic, width, height, pitch, bpp, level = HEADER.unpack(source.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Not a capture file")
+        while True:
+            length = source.read(FRAME.size)
+            if len(length) < FRAME.size:
+                return
+            data = source.read(FRAME.unpack(length)[0])
+            yield data if level == 0 else zlib.decompress(data)
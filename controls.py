@@ -120,6 +120,12 @@ class AiInput(UserInput):
         self.direction = Direction()
         self.button = Buttons()
 
+    def get_direction(self) -> Direction:
+        return self.direction
+
+    def get_buttons(self) -> Buttons:
+        return self.button
+
 
 class Input(object):
     def __init__(self):
@@ -0,0 +1,109 @@
+import numpy
+from time import perf_counter
+from pygame import Surface, BLEND_MULT
+from pygame.surfarray import make_surface, pixels2d
+
+
+class CrtFilter(object):
+    """
+    CRT look for the upscaled screen, on the CPU.
+
+    Everything is computed once for the screen size: a multiply overlay with
+    the scanlines (`LOW`), the same overlay with phosphor triads and a
+    vignette (`MEDIUM`), and a barrel curvature remap table whose border
+    mask is folded into the overlay (`HIGH`). Per frame the filter costs one
+    blend blit, plus one vectorized gather for the curvature.
+
+    The time spent is tracked; when it stays above `budget` milliseconds the
+    quality drops a level, and that level becomes the ceiling.
+    """
+    OFF = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+    def __init__(self, size: tuple, scale: int, budget: float, level: int = HIGH, warmup: int = 30):
+        """
+        Parameters
+        ----------
+        size : tuple
+            Width and height of the screen.
+        scale : int
+            Screen rows per backbuffer row, the scanline period.
+        budget : float
+            Milliseconds the filter may take per frame.
+        level : int
+            Highest quality to use.
+        warmup : int
+            Frames measured before the level may drop.
+        """
+        self.size = size
+        self.budget = budget
+        self.level = level
+        self.warmup = warmup
+        self.cost: float = 0
+        self.__frames = 0
+        width, height = size
+
+        rows = numpy.ones(height)
+        rows[scale - 1::scale] = 0.55
+        scanlines = numpy.ones((width, height, 3)) * rows[None, :, None]
+
+        triads = numpy.full((3, 3), 0.8)
+        numpy.fill_diagonal(triads, 1.0)
+        phosphor = triads[numpy.arange(width) % 3][:, None, :]
+        u = numpy.linspace(-1, 1, width)[:, None]
+        v = numpy.linspace(-1, 1, height)[None, :]
+        vignette = numpy.clip(1 - 0.25 * (u * u + v * v) ** 2, 0, 1)[:, :, None]
+        shaded = scanlines * phosphor * vignette
+
+        """ Barrel distortion: where each screen pixel samples from """
+        bend = 0.08
+        su = u * (1 + bend * v * v)
+        sv = v * (1 + bend * u * u)
+        inside = (numpy.abs(su) <= 1) & (numpy.abs(sv) <= 1)
+        sx = numpy.clip(((su + 1) * 0.5 * (width - 1)).round(), 0, width - 1).astype(numpy.intp)
+        sy = numpy.clip(((sv + 1) * 0.5 * (height - 1)).round(), 0, height - 1).astype(numpy.intp)
+        """ Flat indices into the (height, width) pixel memory """
+        self.__remap = (sy * width + sx).T.reshape(-1)
+        self.__buffer = None
+
+        self.__overlays = [
+            None,
+            self.__surface(scanlines),
+            self.__surface(shaded),
+            self.__surface(shaded * inside[:, :, None]),
+        ]
+
+    def apply(self, screen: Surface) -> None:
+        if self.level == self.OFF:
+            return
+        start = perf_counter()
+        if self.level >= self.HIGH:
+            self.__curve(screen)
+        screen.blit(self.__overlays[self.level], (0, 0), None, BLEND_MULT)
+        self.__measure((perf_counter() - start) * 1000)
+
+    def __curve(self, screen: Surface) -> None:
+        pixels = pixels2d(screen)
+        """ pixels2d is (width, height); its transpose walks the memory in order """
+        memory = pixels.T
+        if memory.flags['C_CONTIGUOUS'] is False:
+            self.level = self.MEDIUM
+            return
+        flat = memory.reshape(-1)
+        if self.__buffer is None or self.__buffer.dtype != flat.dtype:
+            self.__buffer = numpy.empty(flat.shape, flat.dtype)
+        numpy.take(flat, self.__remap, out=self.__buffer)
+        flat[:] = self.__buffer
+        del flat, memory, pixels
+
+    def __measure(self, elapsed: float) -> None:
+        self.__frames += 1
+        self.cost = elapsed if self.__frames == 1 else self.cost * 0.9 + elapsed * 0.1
+        if self.__frames > self.warmup and self.cost > self.budget and self.level > self.LOW:
+            self.level -= 1
+            self.__frames = 0
+
+    def __surface(self, values: numpy.ndarray) -> Surface:
+        return make_surface((values * 255).astype(numpy.uint8)).convert()
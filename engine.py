@@ -7,10 +7,13 @@ from controls import Controller, Input
 from pygame import USEREVENT
 from pygame.mouse import set_visible
 from exceptions import MethodNotImplemented
+from pipeline import Pipeline, DrawList
+from memory import AllocationTracker, FrameCollector
+from typing import Optional
 
 class GameState(object):
     def __init__(self):
-        pass
+        self.stack: 'StateStack' = None
 
     def update(self, time: int, input: Input) -> None:
         raise MethodNotImplemented("Implement `update` method")
@@ -24,14 +27,84 @@ class GameState(object):
     def on_event(self, e) -> None:
         raise MethodNotImplemented("Implement `on_event` method")
 
+    def enter(self) -> None:
+        """ Called when the state is pushed on the stack """
+        pass
+
+    def exit(self) -> None:
+        """ Called when the state is popped from the stack """
+        pass
+
+
+class StateStack(object):
+    """
+    Stack of preconstructed game states. Only the top one is updated and
+    drawn; states are reused, so a transition only runs `exit`/`enter`.
+    """
+
+    def __init__(self):
+        self.__states: list = []
+
+    def __len__(self) -> int:
+        return len(self.__states)
+
+    def top(self) -> GameState:
+        return self.__states[-1]
+
+    def push(self, state: GameState) -> None:
+        state.stack = self
+        self.__states.append(state)
+        state.enter()
+
+    def pop(self) -> GameState:
+        state = self.__states.pop()
+        state.exit()
+        return state
+
+    def replace(self, state: GameState) -> None:
+        self.pop()
+        self.push(state)
+
 
 class Engine():
     FPS = 30  # 1/60th of second
     GAME_EVENT = USEREVENT + 1
 
-    def __init__(self, renderer: Renderer):
+    def __init__(
+        self,
+        renderer: Renderer,
+        pipelined: bool = False,
+        collector: Optional[FrameCollector] = None,
+        tracker: Optional[AllocationTracker] = None,
+        interpolated: bool = False
+    ):
+        """
+        Parameters
+        ----------
+        renderer : Renderer
+            The renderer that presents the frames.
+        pipelined : bool
+            Render and present on a background thread while the next frame
+            is simulated.
+        collector : FrameCollector
+            Run garbage collection between frames instead of automatically.
+        tracker : AllocationTracker
+            Report allocations of the frame loop per phase and subsystem.
+        interpolated : bool
+            Present at the display rate and keep simulating at `FPS`,
+            drawing positions interpolated between the last two ticks.
+        """
         self.__renderer: Renderer = renderer
+        self.__pipeline = Pipeline(renderer) if pipelined is True else None
+        self.__collector = collector
+        self.__tracker = tracker
+        self.__interpolated = interpolated
+        self.__previous = DrawList(renderer)
+        self.__current = DrawList(renderer)
+        self.__lag = 0
+        self.__marked: float = 0
         self.__run = True
+        self.states = StateStack()
         self.controller = Controller()
         set_visible(False)
 
@@ -59,18 +132,113 @@ class Engine():
 
     def run(self, state: GameState):
         clock: Clock = Clock()
+        self.states.push(state)
+        if self.__pipeline is not None:
+            self.__pipeline.start()
+        if self.__collector is not None:
+            self.__collector.start()
+        if self.__tracker is not None:
+            self.__tracker.start()
 
-        while(self.__run is True):
+        fps = self.FPS
+        if self.__interpolated is True:
+            fps = self.__renderer.present_rate()
+            self.__lag = 1000 // self.FPS
+
+        while(self.__run is True and len(self.states) > 0):
+            state = self.states.top()
+            self.__begin()
             for event in get():
                 if event.type == self.GAME_EVENT:
                     state.on_event(event)
                     continue
                 self.on_event(event)
             self.controller.on_event()
-            state.update(clock.get_time(), self.controller)
+            self.__end('input')
+            if self.__interpolated is True:
+                self.__interpolated_frame(clock.get_time())
+            else:
+                self.__begin()
+                state.update(clock.get_time(), self.controller)
+                self.__end('update')
+                self.__draw(state)
+                self.__transition(state)
+            if self.__collector is not None:
+                self.__collector.idle()
+            clock.tick(fps)
+            if self.__tracker is not None:
+                self.__tracker.frame()
+        if self.__tracker is not None:
+            self.__tracker.stop()
+        if self.__collector is not None:
+            self.__collector.stop()
+        if self.__pipeline is not None:
+            self.__pipeline.stop()
+        while len(self.states) > 0:
+            self.states.pop()
+        self.__cleanup()
+
+    def __transition(self, state: GameState) -> None:
+        next_state = state.state()
+        if next_state is not state:
+            self.states.replace(next_state)
+
+    def __interpolated_frame(self, time: int) -> None:
+        """
+        Run as many fixed simulation ticks as the elapsed time asks for,
+        recording each into a draw list, then present the last two lists
+        blended by how far the display is into the next tick.
+        """
+        step = 1000 // self.FPS
+        self.__lag = min(self.__lag + time, step * 4)
+        while self.__lag >= step and len(self.states) > 0:
+            state = self.states.top()
+            self.__begin()
+            state.update(step, self.controller)
+            self.__end('update')
+            self.__previous, self.__current = self.__current, self.__previous
+            self.__current.cls()
+            self.__begin()
+            state.draw(self.__current)
+            self.__end('draw')
+            if self.__marked == 0:
+                self.__marked = self.__current.marked
+            self.__transition(state)
+            self.__lag -= step
+        alpha = self.__lag / step
+        self.__begin()
+        self.__renderer.cls()
+        self.__current.blend(self.__previous, alpha, self.__renderer)
+        if self.__marked > 0:
+            """ Blended positions still trail the last tick by the rest of it """
+            self.__renderer.mark(self.__marked - (1 - alpha) * step / 1000)
+            self.__marked = 0
+        self.__renderer.draw_to_screen()
+        self.__end('present')
+
+    def __draw(self, state: GameState) -> None:
+        if self.__pipeline is None:
             self.__renderer.cls()
+            self.__begin()
             state.draw(self.__renderer)
+            self.__end('draw')
+            self.__begin()
             self.__renderer.draw_to_screen()
-            state = state.state()
-            clock.tick(self.FPS)
-        self.__cleanup()
+            self.__end('present')
+            return
+        recorder = self.__pipeline.recorder()
+        recorder.cls()
+        self.__begin()
+        state.draw(recorder)
+        self.__end('draw')
+        self.__begin()
+        self.__pipeline.submit()
+        self.__end('present')
+
+    def __begin(self) -> None:
+        if self.__tracker is not None:
+            self.__tracker.begin()
+
+    def __end(self, phase: str) -> None:
+        if self.__tracker is not None:
+            self.__tracker.end(phase)
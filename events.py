@@ -0,0 +1,36 @@
+from pygame.event import Event, post
+from engine import Engine
+
+
+class Spawner(object):
+    """
+    Posts timed game events from a precomputed schedule.
+
+    The schedule is a list of (time, attributes) pairs, `time` being the
+    milliseconds since `start`. Only the due time of the next entry is
+    checked each tick, so the cost does not depend on how many events or
+    entities there are. Due events are posted as `Engine.GAME_EVENT`, which
+    the engine hands to the current state's `on_event`.
+    """
+
+    def __init__(self):
+        self.time: int = 0
+        self.index: int = 0
+        self.__schedule: list = []
+        self.__due: float = float('inf')
+
+    def start(self, schedule: list) -> None:
+        self.__schedule = sorted(schedule, key=lambda entry: entry[0])
+        self.seek(0, 0)
+
+    def seek(self, time: int, index: int) -> None:
+        """ Continue from `time` with the `index`th entry due next """
+        self.time = time
+        self.index = index
+        self.__due = self.__schedule[index][0] if index < len(self.__schedule) else float('inf')
+
+    def update(self, time: int) -> None:
+        self.time += time
+        while self.time >= self.__due:
+            post(Event(Engine.GAME_EVENT, self.__schedule[self.index][1]))
+            self.seek(self.time, self.index + 1)
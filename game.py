@@ -1,59 +1,275 @@
 from pygame.sprite import collide_rect
 from pygame import Rect, Vector2
-from engine import GameState
-from controls import Input
+from pygame.event import clear
+from engine import Engine, GameState
+from controls import Input, State
+from timer import Timer
 from renderer import Renderer
-from sprites import Ship, Letter, AllAliens
+from sprites import Ship, Letter, AllAliens, MysteryShip
+from events import Spawner
+from manifest import SPRITES
+from snapshot import Snapshot, RewindBuffer
+from hiscore import HiScores
+from audio import Audio
+from observation import Observation
+from waves import Wave, load
+from typing import Optional
+from time import perf_counter
 
 class LoadState(GameState):
-    def __init__(self, renderer: Renderer) -> None:
+    """
+    Loads the assets once and builds every other state up front, so later
+    transitions never allocate or touch the disk.
+    """
+    def __init__(
+        self,
+        renderer: Renderer,
+        hiscores: Optional[HiScores] = None,
+        audio: Optional[Audio] = None,
+        wave: str = "assets/waves/classic.json"
+    ) -> None:
         super().__init__()
         self.renderer = renderer
+        self.hiscores = hiscores
+        self.audio = audio
+        self.wave = wave
 
     def update(self, time: int, input: Input) -> None:
+        self.renderer.register_image(Ship.SPRITE, SPRITES.image, (0, 0, 0), False)
+        play = PlayState(self.renderer, self.hiscores, self.audio, load(self.wave))
+        attract = AttractState(play)
+        play.game_over = GameOverState(play, attract)
+        play.next_wave = NextWaveState(play)
+        self.stack.replace(attract)
+
+    def draw(self, renderer: Renderer) -> None:
+        pass
+
+    def state(self) -> GameState:
+        return self
+
+    def on_event(self, e) -> None:
+        pass
+
+class AttractState(GameState):
+    def __init__(self, play: 'PlayState') -> None:
+        super().__init__()
+        self.play = play
+        self.title = Letter(Rect(56, 96, 112, 8), 'SPACE INVADERS', 0)
+        self.push_start = Letter(Rect(72, 136, 80, 8), 'PUSH START', 0)
+
+    def update(self, time: int, input: Input) -> None:
+        self.play.update_hud()
+        if input.get_buttons().is_pressed(State.START):
+            self.stack.replace(self.play)
+
+    def draw(self, renderer: Renderer) -> None:
+        self.play.draw_hud(renderer)
+        self.title.draw(renderer)
+        self.push_start.draw(renderer)
+
+    def state(self) -> GameState:
+        return self
+
+    def on_event(self, e) -> None:
         pass
 
+class GameOverState(GameState):
+    def __init__(self, play: 'PlayState', attract: AttractState) -> None:
+        super().__init__()
+        self.play = play
+        self.attract = attract
+        self.timer = Timer(3000)
+        self.label = Letter(Rect(76, 56, 72, 8), 'GAME OVER', 0)
+
+    def enter(self) -> None:
+        self.timer.counter = 0
+
+    def update(self, time: int, input: Input) -> None:
+        if self.timer.completed(time):
+            self.stack.replace(self.attract)
+
     def draw(self, renderer: Renderer) -> None:
+        self.play.draw(renderer)
+        self.label.draw(renderer)
+
+    def state(self) -> GameState:
+        return self
+
+    def on_event(self, e) -> None:
         pass
 
+class NextWaveState(GameState):
+    """ Pushed over a cleared `PlayState`, pops back once the wave is reset """
+    def __init__(self, play: 'PlayState') -> None:
+        super().__init__()
+        self.play = play
+        self.timer = Timer(1500)
+
+    def enter(self) -> None:
+        self.timer.counter = 0
+
+    def update(self, time: int, input: Input) -> None:
+        if self.timer.completed(time):
+            self.play.start_wave()
+            self.stack.pop()
+
+    def draw(self, renderer: Renderer) -> None:
+        self.play.draw(renderer)
+
     def state(self) -> GameState:
-        return PlayState(self.renderer)
+        return self
 
     def on_event(self, e) -> None:
         pass
 
 class PlayState(GameState):
-    def __init__(self, renderer: Renderer):
-        renderer.register_image(Ship.SPRITE, "assets/sprites.png", (0, 0, 0), False)
+    MYSTERY_SPAN = 20 * 60 * 1000  # milliseconds of spawns per wave, past when the slowest formation lands
+
+    def __init__(
+        self,
+        renderer: Renderer,
+        hiscores: Optional[HiScores] = None,
+        audio: Optional[Audio] = None,
+        wave: Optional[Wave] = None
+    ):
+        super().__init__()
         self.screen = renderer.screen()
         self.boundary = Rect(9, 38, 205, 205)
         self.ship = Ship(self.boundary)
-        self.aliens = AllAliens(self.boundary)
+        self.aliens = AllAliens(self.boundary, wave)
+        self.mystery = MysteryShip(self.boundary)
+        self.spawner = Spawner()
+        self.spawner.start(self.__schedule())
         self.player_one_score_label = Letter(Rect(8, 12, 64, 8), 'SCORE<1>')
         self.player_two_score_label = Letter(Rect(152, 12, 64, 8), 'SCORE<2>')
         self.player_one_score = Letter(Rect(24, 28, 40, 8), '')
         self.hi_score = Letter(Rect(88, 28, 40, 8), '')
         self.hi_score_label = Letter(Rect(80, 12, 64, 8), 'HI-SCORE')
+        self.hiscores = hiscores
+        self.audio = audio
+        self.tick = 0
+        """ When the first sound of the current tick was triggered, for `Renderer.mark` """
+        self.cue: float = 0
+        self.snapshot = Snapshot()
+        self.history: Optional[RewindBuffer] = None
+        self.observation = Observation(renderer.backbuffer())
+        self.game_over: Optional[GameState] = None
+        self.next_wave: Optional[GameState] = None
+
+    def enter(self) -> None:
+        self.ship.reset()
+        self.start_wave()
+        self.update_hud()
+
+    def start_wave(self) -> None:
+        self.aliens.reset()
+        self.ship.bullets.clear()
+        self.mystery.reset()
+        self.spawner.seek(0, 0)
+        self.tick = 0
+        if self.history is not None:
+            self.history.clear()
 
     def update(self, time: int, input: Input) -> None:
         self.ship.set_input(input)
         self.ship.update(time)
+        self.spawner.update(time)
+        self.mystery.update(time)
         self.__collide_aliens()
+        self.__collide_mystery()
         self.__collide_ship()
         self.aliens.update(time)
-        self.player_one_score.set_text(self.ship.score())
+        self.__play_sounds()
+        self.update_hud()
+        self.tick += 1
+        if self.history is not None:
+            self.history.push(self.save())
+
+        if self.aliens.reached(self.ship.rect.top) and self.game_over is not None:
+            self.stack.replace(self.game_over)
+        elif self.aliens.count() == 0 and self.next_wave is not None:
+            self.stack.push(self.next_wave)
 
     def draw(self, renderer: Renderer) -> None:
         self.ship.draw(renderer)
         self.aliens.draw(renderer)
+        self.mystery.draw(renderer)
+        self.draw_hud(renderer)
+        if self.cue > 0:
+            renderer.mark(self.cue)
+            self.cue = 0
+
+    def update_hud(self) -> None:
+        self.player_one_score.set_text(self.ship.score())
+        if self.hiscores is not None:
+            self.hi_score.set_text(max(self.hiscores.best(), self.ship.score()))
+
+    def draw_hud(self, renderer: Renderer) -> None:
         self.player_one_score.draw(renderer)
         self.player_one_score_label.draw(renderer)
         self.player_two_score_label.draw(renderer)
         self.hi_score.draw(renderer)
         self.hi_score_label.draw(renderer)
 
+    def save(self) -> bytes:
+        return self.snapshot.capture(self)
+
+    def load(self, data: bytes) -> None:
+        """ Spawns already posted belong to the abandoned timeline """
+        clear(Engine.GAME_EVENT)
+        self.snapshot.restore(self, data)
+        self.player_one_score.set_text(self.ship.score())
+
+    def rewind(self, steps: int = 1) -> None:
+        if self.history is None:
+            return
+        data = self.history.rewind(steps)
+        if data is not None:
+            self.load(data)
+
+    def pixels(self, step: int = 1):
+        """ NumPy view of the backbuffer, see `Observation.pixels` """
+        return self.observation.pixels(step)
+
+    def gray(self, out, step: int = 1) -> None:
+        """ Fill `out` with the grayscale backbuffer, see `Observation.gray` """
+        self.observation.gray(out, step)
+
+    def observe(self, out) -> None:
+        """ Fill `out` with the entity vector, see `Observation.entities` """
+        self.observation.entities(self, out)
+
     def __collide_aliens(self) -> None:
-        self.aliens.collide(self.ship)
+        if self.aliens.collide(self.ship) and self.audio is not None:
+            self.audio.play(Audio.EXPLOSION)
+            self.__cue()
+
+    def __collide_mystery(self) -> None:
+        if self.mystery.collide(self.ship) and self.audio is not None:
+            self.audio.play(Audio.EXPLOSION)
+            self.__cue()
+
+    def __schedule(self) -> list:
+        """ Every mystery ship of a wave, the same for all of them """
+        return [
+            (time, {'kind': MysteryShip.EVENT})
+            for time in range(MysteryShip.INTERVAL, self.MYSTERY_SPAN + 1, MysteryShip.INTERVAL)
+        ]
+
+    def __play_sounds(self) -> None:
+        if self.audio is None:
+            return
+        if self.ship.fired is True:
+            self.audio.play(Audio.SHOT)
+            self.__cue()
+        if self.aliens.stepped is True:
+            self.audio.step()
+            self.__cue()
+
+    def __cue(self) -> None:
+        if self.cue == 0:
+            self.cue = perf_counter()
 
     def __collide_ship(self) -> None:
         pass
@@ -61,5 +277,14 @@ class PlayState(GameState):
     def state(self) -> 'GameState':
         return self
 
+    def on_event(self, e) -> None:
+        """ The ship's direction follows the player's shot count """
+        if getattr(e, 'kind', None) != MysteryShip.EVENT:
+            return
+        if self.mystery.is_alive() is True or self.aliens.count() < 8:
+            return
+        self.mystery.spawn(1 if self.ship.shots % 2 == 0 else -1)
 
-
+    def exit(self) -> None:
+        if self.hiscores is not None:
+            self.hiscores.submit(self.ship.score())
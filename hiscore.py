@@ -0,0 +1,104 @@
+import sqlite3
+from bisect import insort
+from queue import Queue, Empty
+from threading import Thread, Lock
+from typing import Optional
+
+
+class HiScores(object):
+    """
+    Persistent hi-score table backed by SQLite.
+
+    The table is loaded lazily by a background worker, which also owns the
+    database connection and commits submitted scores in batches. The frame
+    loop only touches the in-memory cache, so reading the best score is O(1)
+    and submitting never waits on the disk.
+    """
+
+    def __init__(self, path: str = 'hiscores.db', size: int = 10, batch: int = 32, delay: float = 0.5):
+        """
+        Parameters
+        ----------
+        path : str
+            The SQLite database file.
+        size : int
+            How many entries of the top table are cached.
+        batch : int
+            Maximum number of scores written in one transaction.
+        delay : float
+            Seconds the writer waits for more scores before committing.
+        """
+        self.path = path
+        self.size = size
+        self.batch = batch
+        self.delay = delay
+        self.__top: list = []
+        self.__best: int = 0
+        self.__lock = Lock()
+        self.__queue: Queue = Queue()
+        self.__worker: Optional[Thread] = None
+
+    def best(self) -> int:
+        self.__start()
+        return self.__best
+
+    def top(self) -> list:
+        """ Cached top table, highest score first """
+        self.__start()
+        with self.__lock:
+            return self.__top[::-1]
+
+    def submit(self, score: int) -> None:
+        if score <= 0:
+            return
+        self.__start()
+        self.__cache([score])
+        self.__queue.put(score)
+
+    def close(self) -> None:
+        """ Flush pending scores and stop the writer """
+        if self.__worker is None:
+            return
+        self.__queue.put(None)
+        self.__worker.join()
+        self.__worker = None
+
+    def __start(self) -> None:
+        if self.__worker is not None:
+            return
+        self.__worker = Thread(target=self.__run, name='hiscores', daemon=True)
+        self.__worker.start()
+
+    def __cache(self, scores: list) -> None:
+        with self.__lock:
+            for score in scores:
+                insort(self.__top, score)
+            del self.__top[:-self.size]
+            if self.__top:
+                self.__best = self.__top[-1]
+
+    def __run(self) -> None:
+        connection = sqlite3.connect(self.path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS scores (score INTEGER NOT NULL)')
+        connection.commit()
+        rows = connection.execute(
+            'SELECT score FROM scores ORDER BY score DESC LIMIT ?', (self.size,))
+        self.__cache([row[0] for row in rows])
+
+        running = True
+        while running:
+            pending = [self.__queue.get()]
+            while len(pending) < self.batch:
+                try:
+                    pending.append(self.__queue.get(timeout=self.delay))
+                except Empty:
+                    break
+            if None in pending:
+                running = False
+            scores = [(score,) for score in pending if score is not None]
+            if scores:
+                with connection:
+                    connection.executemany('INSERT INTO scores (score) VALUES (?)', scores)
+        connection.close()
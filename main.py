@@ -1,12 +1,48 @@
+from argparse import ArgumentParser
 from engine import Engine
-from renderer import SdlRenderer
+from renderer import SdlRenderer, CABINET_BANDS
 from game import LoadState
+from hiscore import HiScores
+from audio import Audio
+from capture import Capture
+from memory import AllocationTracker, FrameCollector
+from crt import CrtFilter
 
 
 def main():
-    renderer = SdlRenderer(224, 260, 672, 780)
-    engine: Engine = Engine(renderer)
-    engine.run(LoadState(renderer))
+    parser = ArgumentParser(description="Space Invaders")
+    parser.add_argument('--wave', default='assets/waves/classic.json', help="alien formation file")
+    parser.add_argument('--color', action='store_true', help="tint the screen like the cabinet overlay")
+    parser.add_argument('--crt', type=int, choices=range(4), default=0, help="highest CRT effect quality")
+    parser.add_argument('--smooth', action='store_true', help="present at the display rate, interpolating positions")
+    parser.add_argument('--vsync', action='store_true', help="wait for the vertical blank when presenting")
+    parser.add_argument('--refresh-rate', type=int, default=60, help="display rate --smooth presents at")
+    parser.add_argument('--pipelined', action='store_true', help="render on a separate thread")
+    parser.add_argument('--gc-control', action='store_true', help="collect garbage between frames only")
+    parser.add_argument('--track-allocations', type=int, metavar='N', help="report allocations every N frames")
+    parser.add_argument('--capture', metavar='FILE', help="record the backbuffer to FILE")
+    parser.add_argument('--capture-level', type=int, default=0, help="zlib level of captured frames")
+    parser.add_argument('--capture-block', action='store_true', help="wait instead of dropping frames")
+    args = parser.parse_args()
+
+    renderer = SdlRenderer(224, 260, 672, 780, bands=CABINET_BANDS if args.color else None,
+                            vsync=args.vsync, refresh_rate=args.refresh_rate)
+    if args.crt > 0:
+        """ A quarter of the frame is left to the effect """
+        renderer.crt = CrtFilter((672, 780), 3, 250 / Engine.FPS, args.crt)
+    if args.capture is not None:
+        backpressure = Capture.BLOCK if args.capture_block else Capture.DROP
+        renderer.capture = Capture(args.capture, backpressure=backpressure, level=args.capture_level)
+    hiscores = HiScores()
+    audio = Audio()
+    collector = FrameCollector() if args.gc_control else None
+    tracker = AllocationTracker(args.track_allocations) if args.track_allocations else None
+    engine: Engine = Engine(renderer, args.pipelined, collector, tracker, args.smooth)
+    engine.run(LoadState(renderer, hiscores, audio, args.wave))
+    hiscores.close()
+    if renderer.capture is not None:
+        renderer.capture.close()
+        print("captured %d frames, dropped %d" % (renderer.capture.frames, renderer.capture.dropped))
 
 
 if __name__ == "__main__":
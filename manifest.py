@@ -0,0 +1,72 @@
+import marshal
+from os import stat
+from os.path import dirname, join, abspath
+
+ASSETS = join(dirname(abspath(__file__)), 'assets')
+
+
+class Manifest(object):
+    """
+    Regions of a sprite sheet, looked up by integer id.
+
+    The JSON manifest lists `[name, x, y, width, height]` entries; an entry's
+    id is its position in the list. On first use it is compiled into a
+    marshalled tuple index next to it (`.idx`), which later runs load
+    directly until the manifest changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.image: str = ''
+        self.names: tuple = ()
+        self.regions: tuple = ()
+        self.__ids: dict = {}
+        self.__load()
+
+    def id(self, name: str) -> int:
+        return self.__ids[name]
+
+    def region(self, id: int) -> tuple:
+        """ Source area as an (x, y, width, height) tuple """
+        return self.regions[id]
+
+    def prefixed(self, prefix: str) -> dict:
+        """ Regions whose name starts with `prefix`, keyed by the rest of it """
+        return {
+            name[len(prefix):]: self.regions[id]
+            for id, name in enumerate(self.names) if name.startswith(prefix)
+        }
+
+    def __load(self) -> None:
+        index = self.path[:-len('.json')] + '.idx'
+        version = stat(self.path).st_mtime_ns
+        try:
+            with open(index, 'rb') as source:
+                compiled = marshal.load(source)
+            if compiled[0] != version:
+                raise ValueError("Stale sprite index")
+        except (OSError, ValueError, EOFError, TypeError):
+            compiled = self.__compile(version)
+            try:
+                with open(index, 'wb') as output:
+                    marshal.dump(compiled, output)
+            except OSError:
+                pass
+        _, image, self.names, self.regions = compiled
+        self.image = join(dirname(self.path), image)
+        self.__ids = {name: id for id, name in enumerate(self.names)}
+
+    def __compile(self, version: int) -> tuple:
+        import json
+        with open(self.path) as source:
+            data = json.load(source)
+        entries = data['regions']
+        return (
+            version,
+            data['image'],
+            tuple(entry[0] for entry in entries),
+            tuple(tuple(entry[1:5]) for entry in entries)
+        )
+
+
+SPRITES = Manifest(join(ASSETS, 'sprites.json'))
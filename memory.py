@@ -0,0 +1,138 @@
+import gc
+import tracemalloc
+from os.path import basename, dirname, abspath
+from sys import stdout
+from typing import Optional
+
+ROOT = dirname(abspath(__file__))
+
+
+class AllocationTracker(object):
+    """
+    Attributes allocations of the frame loop to its phases and call sites.
+
+    The engine brackets each phase of the frame (input poll, update, draw,
+    present) with `begin` and `end`; the traced peak above what was live at
+    `begin` is the memory the phase allocated, including the objects it
+    freed again before returning. These are reported per frame and phase
+    every `every` frames.
+
+    Memory that is kept is found by diffing a tracemalloc snapshot against
+    the previous one: the growth per frame of each subsystem (module of the
+    repository, anything else is `other`) and of the busiest call sites.
+    """
+
+    def __init__(self, every: int = 300, top: int = 8, output=stdout):
+        self.every = every
+        self.top = top
+        self.output = output
+        self.__frames = 0
+        self.__start = 0
+        self.__phases: dict = {}
+        self.__names: dict = {}
+        self.__snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self.__snapshot = self.__take()
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.__snapshot = None
+
+    def frame(self) -> None:
+        """ Close the current frame, called once per frame by the engine """
+        self.__frames += 1
+        if self.__frames % self.every == 0:
+            snapshot = self.__take()
+            self.__report(snapshot.compare_to(self.__snapshot, 'lineno'))
+            self.__snapshot = snapshot
+            self.__phases.clear()
+
+    def begin(self) -> None:
+        """ Start measuring a phase of the frame """
+        tracemalloc.reset_peak()
+        self.__start = tracemalloc.get_traced_memory()[0]
+
+    def end(self, phase: str) -> None:
+        """ Add the bytes allocated since `begin` to `phase` """
+        allocated = tracemalloc.get_traced_memory()[1] - self.__start
+        total, peak = self.__phases.get(phase, (0, 0))
+        self.__phases[phase] = (total + allocated, max(peak, allocated))
+
+    def __take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def __subsystem(self, filename: str) -> str:
+        name = self.__names.get(filename)
+        if name is None:
+            name = 'other'
+            if not filename.startswith('<') and dirname(abspath(filename)) == ROOT:
+                name = basename(filename)[:-3]
+            self.__names[filename] = name
+        return name
+
+    def __report(self, stats: list) -> None:
+        subsystems: dict = {}
+        sites = []
+        for stat in stats:
+            if stat.count_diff == 0 and stat.size_diff == 0:
+                continue
+            name = self.__subsystem(stat.traceback[0].filename)
+            if name != 'other':
+                sites.append(stat)
+            count, size = subsystems.get(name, (0, 0))
+            subsystems[name] = (count + stat.count_diff, size + stat.size_diff)
+
+        write = self.output.write
+        write("frames %d-%d:\n" % (self.__frames - self.every, self.__frames))
+        for phase, (total, peak) in sorted(self.__phases.items(), key=lambda item: -item[1][0]):
+            write("  %-12s %10.1f B/frame allocated %10d B at most\n" % (phase, total / self.every, peak))
+        write("  retained:\n")
+        for name, (count, size) in sorted(subsystems.items(), key=lambda item: -abs(item[1][1])):
+            write("  %-12s %+9.2f blocks/frame %+10.1f B/frame\n" % (name, count / self.every, size / self.every))
+        sites.sort(key=lambda stat: -abs(stat.count_diff))
+        for stat in sites[:self.top]:
+            frame = stat.traceback[0]
+            write("    %s:%-5d %+9.2f blocks/frame\n" % (
+                basename(frame.filename), frame.lineno, stat.count_diff / self.every))
+        self.output.flush()
+
+
+class FrameCollector(object):
+    """
+    Takes garbage collection out of the frame.
+
+    Automatic collection is disabled while the engine runs, the objects
+    alive at start are frozen out of the collector, and `idle` runs a young
+    generation collection every frame, the middle one every `middle` frames
+    and a full one every `full` frames. The engine calls `idle` right before
+    waiting for the next frame, so the collection uses time the frame would
+    spend sleeping anyway.
+    """
+
+    def __init__(self, middle: int = 10, full: int = 900):
+        self.middle = middle
+        self.full = full
+        self.__frames = 0
+
+    def start(self) -> None:
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+
+    def stop(self) -> None:
+        gc.unfreeze()
+        gc.enable()
+
+    def idle(self) -> None:
+        self.__frames += 1
+        if self.full > 0 and self.__frames % self.full == 0:
+            gc.collect(2)
+        elif self.__frames % self.middle == 0:
+            gc.collect(1)
+        else:
+            gc.collect(0)
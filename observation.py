@@ -0,0 +1,90 @@
+from ctypes import c_uint8
+import numpy
+from pygame import Surface
+
+
+class Observation(object):
+    """
+    Views of the game for bots and analytics.
+
+    `pixels` exposes the backbuffer as a NumPy array sharing the surface
+    memory; downsampling is a plain strided slice, so no pixel is copied.
+    `gray` writes the brightest channel of each pixel into a caller-owned
+    array, so sprites tinted by the colour bands stay visible. Both show
+    whatever is in the backbuffer when they are read, i.e. the last drawn
+    frame once the state has been drawn. In the pipelined engine the render
+    thread draws into the backbuffer while the next frame is simulated, so
+    a read can see a half drawn frame; bots reading pixels should run the
+    serial engine.
+
+    `entities` fills a caller-owned vector in place with this layout:
+
+    ====================  ==============================================
+    `SHIP_X`              left of the ship
+    `BULLETS`             x, y of each ship bullet, -1 when absent
+    `OFFSET`              x, y formation offset from its starting place
+    `GRID`                1 per alive alien, row by row, 0 otherwise
+    ====================  ==============================================
+    """
+    MAX_BULLETS = 1
+    SHIP_X = 0
+    BULLETS = 1
+    OFFSET = BULLETS + 2 * MAX_BULLETS
+    GRID = OFFSET + 2
+
+    def __init__(self, backbuffer: Surface):
+        width, height = backbuffer.get_size()
+        bpp = backbuffer.get_bytesize()
+        pitch = backbuffer.get_pitch()
+        memory = (c_uint8 * (pitch * height)).from_address(backbuffer._pixels_address)
+        """ Keep the surface alive as long as the view over its memory """
+        self.__backbuffer = backbuffer
+        self.__rgb = numpy.ndarray((height, width, bpp), numpy.uint8, memory, strides=(pitch, bpp, 1))
+        self.__channels = [shift // 8 for shift in backbuffer.get_shifts()[:3]]
+        self.__views: dict = {}
+
+    def pixels(self, step: int = 1) -> numpy.ndarray:
+        """ The backbuffer as a (height, width, channels) array """
+        view = self.__views.get(step)
+        if view is None:
+            view = self.__rgb[::step, ::step]
+            self.__views[step] = view
+        return view
+
+    def gray(self, out: numpy.ndarray, step: int = 1) -> None:
+        """ Fill the uint8 (height, width) array `out` with the brightest channel of each pixel """
+        view = self.pixels(step)
+        red, green, blue = self.__channels
+        numpy.maximum(view[:, :, red], view[:, :, green], out=out)
+        numpy.maximum(out, view[:, :, blue], out=out)
+
+    def size(self, state) -> int:
+        """ Length of the entity vector for the formation of `state` """
+        return self.GRID + sum(len(group.roster) for group in state.aliens.groups)
+
+    def entities(self, state, out) -> None:
+        out[self.SHIP_X] = state.ship.rect.left
+
+        bullets = state.ship.bullets
+        for index in range(self.MAX_BULLETS):
+            slot = self.BULLETS + 2 * index
+            if index < len(bullets):
+                out[slot] = bullets[index].rect.left
+                out[slot + 1] = bullets[index].rect.top
+            else:
+                out[slot] = -1
+                out[slot + 1] = -1
+
+        out[self.OFFSET] = 0
+        out[self.OFFSET + 1] = 0
+        cell = self.GRID
+        found = False
+        for group in state.aliens.groups:
+            for alien in group.roster:
+                alive = alien.is_alive()
+                out[cell] = alive
+                cell += 1
+                if alive and found is False:
+                    out[self.OFFSET] = alien.rect.left - alien.origin.x
+                    out[self.OFFSET + 1] = alien.rect.top - alien.origin.y
+                    found = True
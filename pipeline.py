@@ -0,0 +1,150 @@
+from threading import Thread, Semaphore
+from typing import Optional
+from pygame import Surface, Rect
+from renderer import Renderer
+
+
+class DrawList(Renderer):
+    """
+    Renderer that records draw calls instead of executing them. Only the
+    destination position is kept, so the recorded list stays valid after
+    the simulation moves the entity rects. Draws given a `key` are also
+    indexed by it, so `blend` can find the same entity in another list.
+    """
+
+    def __init__(self, renderer: Renderer):
+        self.__renderer = renderer
+        self.commands: list = []
+        self.positions: dict = {}
+        self.marked: float = 0
+
+    def cls(self) -> None:
+        self.commands.clear()
+        self.positions.clear()
+        self.marked = 0
+
+    def draw_to_screen(self) -> None:
+        pass
+
+    def compose(self) -> None:
+        pass
+
+    def present(self) -> None:
+        pass
+
+    def mark(self, time: float) -> None:
+        if self.marked == 0:
+            self.marked = time
+
+    def register_image(self, spr: int, filepath: str, color: tuple, transparent: bool) -> None:
+        self.__renderer.register_image(spr, filepath, color, transparent)
+
+    def draw(self, spr: int, src: Rect, dest: Rect, flags: int = 0, key: object = None) -> None:
+        position = (dest[0], dest[1])
+        self.commands.append((spr, src, position, flags, key))
+        if key is not None:
+            self.positions[key] = position
+
+    def draw_with_image(self, image: Surface, dest: Rect, src: Rect, flags: int = 0) -> None:
+        self.commands.append((image, src, (dest[0], dest[1]), flags, None))
+
+    def draw_to_other(self, other: Surface, spr: int, src: Rect, dest: Rect, flags: int = 0) -> None:
+        self.__renderer.draw_to_other(other, spr, src, dest, flags)
+
+    def screen(self) -> tuple:
+        return self.__renderer.screen()
+
+    def backbuffer(self) -> Surface:
+        return self.__renderer.backbuffer()
+
+    def blend(self, previous: 'DrawList', alpha: float, renderer: Renderer, snap: int = 16) -> None:
+        """
+        Replay with every position moved back towards the one recorded in
+        `previous`, `alpha` being 0 at `previous` and 1 here. Draws are
+        matched by their key; a draw without a key or a match, or one that
+        jumped further than `snap` pixels, is drawn where it was recorded.
+        """
+        before = previous.positions
+        for spr, src, (x, y), flags, key in self.commands:
+            if key is not None and key in before:
+                px, py = before[key]
+                if abs(x - px) <= snap and abs(y - py) <= snap:
+                    x = round(px + (x - px) * alpha)
+                    y = round(py + (y - py) * alpha)
+            if isinstance(spr, Surface):
+                renderer.draw_with_image(spr, (x, y), src, flags)
+            else:
+                renderer.draw(spr, src, (x, y), flags, key)
+
+    def replay(self, renderer: Renderer) -> None:
+        if self.marked > 0:
+            renderer.mark(self.marked)
+        for spr, src, dest, flags, key in self.commands:
+            if isinstance(spr, Surface):
+                renderer.draw_with_image(spr, dest, src, flags)
+            else:
+                renderer.draw(spr, src, dest, flags, key)
+
+
+class Pipeline(object):
+    """
+    Renders on a background thread while the simulation builds the next
+    frame.
+
+    The simulation records into one of two draw lists and hands it over
+    once per frame; the render thread clears the backbuffer, replays the
+    list and upscales it into an offscreen frame, which mostly runs inside
+    pygame with the GIL released. SDL only presents from the main thread,
+    so the composed frame is shown at the next handoff. At most one frame
+    is in flight.
+    """
+
+    def __init__(self, renderer: Renderer):
+        self.__renderer = renderer
+        self.__lists = [DrawList(renderer), DrawList(renderer)]
+        self.__back = 0
+        self.__front = 1
+        self.__ready = Semaphore(0)
+        self.__free = Semaphore(1)
+        self.__running = False
+        self.__composed = False
+        self.__thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        self.__running = True
+        self.__thread = Thread(target=self.__run, name='render', daemon=True)
+        self.__thread.start()
+
+    def recorder(self) -> DrawList:
+        """ The draw list the simulation writes the current frame into """
+        return self.__lists[self.__back]
+
+    def submit(self) -> None:
+        self.__free.acquire()
+        if self.__composed is True:
+            self.__renderer.present()
+        self.__composed = True
+        self.__front, self.__back = self.__back, self.__front
+        self.__ready.release()
+
+    def stop(self) -> None:
+        if self.__thread is None:
+            return
+        self.__free.acquire()
+        if self.__composed is True:
+            self.__renderer.present()
+            self.__composed = False
+        self.__running = False
+        self.__ready.release()
+        self.__thread.join()
+        self.__thread = None
+
+    def __run(self) -> None:
+        while True:
+            self.__ready.acquire()
+            if self.__running is False:
+                break
+            self.__renderer.cls()
+            self.__lists[self.__front].replay(self.__renderer)
+            self.__renderer.compose()
+            self.__free.release()
@@ -1,8 +1,18 @@
 from pickle import TRUE
-from pygame import Surface, Rect, image, init, HWSURFACE, DOUBLEBUF, FULLSCREEN
+from pygame import Surface, Rect, image, init, error, HWSURFACE, DOUBLEBUF, FULLSCREEN, SCALED, BLEND_MULT
 from pygame.transform import scale
 from pygame.display import set_mode, update
 from exceptions import MethodNotImplemented
+from capture import Capture
+from crt import CrtFilter
+from typing import Optional
+from time import perf_counter
+
+""" Cellophane strips of the cabinet: top, bottom and colour of each band """
+CABINET_BANDS = [
+    (38, 62, (255, 40, 40)),
+    (196, 260, (40, 255, 40)),
+]
 
 class Renderer(object):
     def __init__(self, bb_width: int, bb_height: int, sc_width: int, sc_height: int, fullscreen: bool = False):
@@ -11,13 +21,22 @@ class Renderer(object):
     def draw_to_screen(self) -> None:
         raise MethodNotImplemented("Implement `draw_to_screen` method")
 
+    def compose(self) -> None:
+        """ Upscale the backbuffer into an offscreen frame, safe off the main thread """
+        raise MethodNotImplemented("Implement `compose` method")
+
+    def present(self) -> None:
+        """ Show the last composed frame, from the main thread only """
+        raise MethodNotImplemented("Implement `present` method")
+
     def cls(self) -> None:
         raise MethodNotImplemented("Implement `cls` method")
 
     def register_image(self, name: int, filepath: str) -> None:
         raise MethodNotImplemented("Implement `register_image` method")
 
-    def draw(self, name: int, src: Rect, dest: Rect) -> None:
+    def draw(self, name: int, src: Rect, dest: Rect, flags: int = 0, key: object = None) -> None:
+        """ `key` identifies the entity drawn, for renderers that track draws across frames """
         raise MethodNotImplemented("Implement `draw` method")
 
     def draw_with_image(self, image: Surface, dest: Rect, src: Rect, flags: int = 0) -> None:
@@ -29,25 +48,107 @@ class Renderer(object):
     def screen(self) -> tuple:
         raise MethodNotImplemented("Implement `screen` method")
 
+    def backbuffer(self) -> Surface:
+        raise MethodNotImplemented("Implement `backbuffer` method")
+
+    def mark(self, time: float) -> None:
+        """ `perf_counter` time of an event the frame being drawn shows """
+        raise MethodNotImplemented("Implement `mark` method")
+
+    def present_rate(self) -> int:
+        """ Frames per second to present at, the cap when vsync is not in effect """
+        raise MethodNotImplemented("Implement `present_rate` method")
+
 
 class SdlRenderer(Renderer):
-    def __init__(self, bb_width: int, bb_height: int, sc_width: int, sc_height: int, fullscreen: bool = False):
+    def __init__(
+        self,
+        bb_width: int,
+        bb_height: int,
+        sc_width: int,
+        sc_height: int,
+        fullscreen: bool = False,
+        bands: Optional[list] = None,
+        vsync: bool = False,
+        refresh_rate: int = 60
+    ):
+        """
+        `bands` is a list of (top, bottom, colour) strips of the backbuffer.
+        A tinted copy of every image is baked per band when it is registered,
+        and `draw` picks the copy for the destination row, so the coloured
+        look costs one table lookup per sprite.
+
+        With `vsync` the display is asked to wait for the vertical blank
+        when presenting, if the driver allows it. SDL only honours that
+        for scaled or OpenGL windows, so the window is opened `SCALED`.
+        pygame cannot report whether vsync took effect nor the monitor's
+        rate, so frames are always capped at `refresh_rate`.
+        """
         init() # Initialize pygame
         self.bb_size = (bb_width, bb_height)
         self.__images: list = []
+        self.__bands: list = bands or []
+        """ Image variant for each row of the backbuffer, 0 is untinted """
+        self.__rows = bytearray(bb_height)
+        for index, (top, bottom, _) in enumerate(self.__bands):
+            for y in range(max(0, top), min(bb_height, bottom)):
+                self.__rows[y] = index + 1
         self.__size = (sc_width, sc_height)
-        if fullscreen is True:
-            self.__screen = set_mode(self.__size, HWSURFACE | DOUBLEBUF | FULLSCREEN)
-        else:
-            self.__screen = set_mode(self.__size)
+        flags = HWSURFACE | DOUBLEBUF | FULLSCREEN if fullscreen is True else 0
+        self.refresh_rate = refresh_rate
+        self.vsync = False
+        if vsync is True:
+            try:
+                self.__screen = set_mode(self.__size, flags | SCALED, vsync=1)
+                self.vsync = True
+            except error:
+                pass
+        if self.vsync is False:
+            self.__screen = set_mode(self.__size, flags)
         """ backbuffer Surface for handling the small graphics """
         self.__backbuffer = Surface(self.bb_size)
+        """ upscaled frame composed off the main thread, see `compose` """
+        self.__frame = Surface(self.__size).convert()
+        self.capture: Optional[Capture] = None
+        self.crt: Optional[CrtFilter] = None
+        """ Most milliseconds seen between a marked event and its frame on screen """
+        self.delay: float = 0
+        self.__mark: float = 0
+        self.__composed_mark: float = 0
 
     def draw_to_screen(self) -> None:
-        self.__backbuffer.convert_alpha()
-        """ upscale backbuffer to screen """
-        scale(self.__backbuffer, self.__size, self.__screen)
+        self.__upscale(self.__screen)
         update()
+        self.__shown(self.__mark)
+        self.__mark = 0
+
+    def compose(self) -> None:
+        self.__upscale(self.__frame)
+        self.__composed_mark = self.__mark
+        self.__mark = 0
+
+    def present(self) -> None:
+        self.__screen.blit(self.__frame, (0, 0))
+        update()
+        self.__shown(self.__composed_mark)
+        self.__composed_mark = 0
+
+    def mark(self, time: float) -> None:
+        if self.__mark == 0:
+            self.__mark = time
+
+    def __shown(self, mark: float) -> None:
+        if mark > 0:
+            self.delay = max(self.delay, (perf_counter() - mark) * 1000)
+
+    def __upscale(self, target: Surface) -> None:
+        self.__backbuffer.convert_alpha()
+        if self.capture is not None:
+            self.capture.grab(self.__backbuffer)
+        """ upscale backbuffer to target """
+        scale(self.__backbuffer, self.__size, target)
+        if self.crt is not None:
+            self.crt.apply(target)
 
     def cls(self) -> None:
         self.__backbuffer.fill((21, 21, 21))
@@ -58,16 +159,31 @@ class SdlRenderer(Renderer):
             surface.convert_alpha()
         else:
             surface.set_colorkey(color)
-        self.__images.insert(spr, surface)
-
-    def draw(self, spr: int, src: Rect, dest: Rect, flags: int = 0) -> None:
-        self.__backbuffer.blit(self.__images[spr], dest, src, flags)
+        variants = [surface]
+        for _, _, tint in self.__bands:
+            tinted = surface.convert_alpha() if transparent is True else surface.convert()
+            tinted.fill(tint, special_flags=BLEND_MULT)
+            if transparent is False:
+                tinted.set_colorkey(color)
+            variants.append(tinted)
+        self.__images.insert(spr, variants)
+
+    def draw(self, spr: int, src: Rect, dest: Rect, flags: int = 0, key: object = None) -> None:
+        y = dest[1]
+        variant = self.__rows[y] if 0 <= y < self.bb_size[1] else 0
+        self.__backbuffer.blit(self.__images[spr][variant], dest, src, flags)
 
     def draw_with_image(self, image: Surface, dest: Rect, src: Rect, flags: int = 0) -> None:
         self.__backbuffer.blit(image, dest, src, flags)
 
     def draw_to_other(self, other: Surface, spr: int, src: Rect, dest: Rect, flags: int = 0) -> None:
-        other.blit(self.__images[spr], dest, src, flags)
+        other.blit(self.__images[spr][0], dest, src, flags)
 
     def screen(self) -> tuple:
         return self.bb_size
+
+    def backbuffer(self) -> Surface:
+        return self.__backbuffer
+
+    def present_rate(self) -> int:
+        return self.refresh_rate
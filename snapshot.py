@@ -0,0 +1,210 @@
+import zlib
+from os import environ
+from random import Random
+from struct import Struct
+from collections import deque
+from time import perf_counter_ns
+from typing import Optional
+from sprites import ShipBullet
+
+HEADER = Struct('<2sBIBB')  # magic, version, tick, bullets, groups
+SHIP = Struct('<hhII?')  # left, top, score, shots, alive
+BULLET = Struct('<hhBBh??')  # left, top, width, height, timer, alive, explode
+GROUP = Struct('<?H')  # changed, roster size
+ALIEN = Struct('<hhbBIiH???')  # see `Alien.save`
+MYSTERY = Struct('<hhbHi??')  # see `MysteryShip.save`
+SPAWNER = Struct('<II')  # time, index of the next event
+
+MAGIC = b'SI'
+VERSION = 2
+
+
+class SnapshotError(ValueError):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class Snapshot(object):
+    """
+    Packs the whole simulation of a `PlayState` in a compact binary form.
+
+    The layout has a fixed size for a given formation, so consecutive
+    snapshots differ only in a few bytes and delta-compress well.
+    Time (in nanoseconds) and size of the last capture and restore are kept
+    for measurement.
+    """
+
+    def __init__(self):
+        self.capture_time: int = 0
+        self.restore_time: int = 0
+        self.size: int = 0
+
+    def capture(self, state) -> bytes:
+        start = perf_counter_ns()
+        ship = state.ship
+        groups = state.aliens.groups
+        chunks = [
+            HEADER.pack(MAGIC, VERSION, state.tick, len(ship.bullets), len(groups)),
+            SHIP.pack(*ship.save())
+        ]
+        for bullet in ship.bullets:
+            chunks.append(BULLET.pack(*bullet.save()))
+        for group in groups:
+            chunks.append(GROUP.pack(group.changed, len(group.roster)))
+            for alien in group.roster:
+                chunks.append(ALIEN.pack(*alien.save()))
+        chunks.append(MYSTERY.pack(*state.mystery.save()))
+        chunks.append(SPAWNER.pack(state.spawner.time, state.spawner.index))
+        data = b''.join(chunks)
+        self.size = len(data)
+        self.capture_time = perf_counter_ns() - start
+        return data
+
+    def restore(self, state, data: bytes) -> None:
+        start = perf_counter_ns()
+        magic, version, tick, bullets, groups = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError("Unknown snapshot format")
+        if groups != len(state.aliens.groups):
+            raise SnapshotError("Snapshot does not match the current formation")
+        offset = HEADER.size
+        state.tick = tick
+
+        ship = state.ship
+        ship.restore(SHIP.unpack_from(data, offset))
+        offset += SHIP.size
+        del ship.bullets[bullets:]
+        for index in range(bullets):
+            if index == len(ship.bullets):
+                ship.bullets.append(ShipBullet(ship.boundary, ship.rect.topleft))
+            ship.bullets[index].restore(BULLET.unpack_from(data, offset))
+            offset += BULLET.size
+
+        for group in state.aliens.groups:
+            changed, size = GROUP.unpack_from(data, offset)
+            offset += GROUP.size
+            if size != len(group.roster):
+                raise SnapshotError("Snapshot does not match the current formation")
+            for alien in group.roster:
+                alien.restore(ALIEN.unpack_from(data, offset))
+                offset += ALIEN.size
+            group.restore(changed)
+
+        state.mystery.restore(MYSTERY.unpack_from(data, offset))
+        offset += MYSTERY.size
+        state.spawner.seek(*SPAWNER.unpack_from(data, offset))
+        self.restore_time = perf_counter_ns() - start
+
+
+class RewindBuffer(object):
+    """
+    Ring of snapshots kept inside a fixed memory budget.
+
+    Only the newest snapshot is stored in full. Every older one is stored as
+    the compressed XOR against its successor, so stepping back walks from the
+    newest entry and the oldest entries can be dropped without touching the
+    rest of the ring.
+    """
+
+    def __init__(self, budget: int = 1 << 20, level: int = 1):
+        """
+        Parameters
+        ----------
+        budget : int
+            Maximum number of bytes held by the newest snapshot and the
+            stored deltas.
+        level : int
+            zlib compression level of the deltas.
+        """
+        self.budget = budget
+        self.level = level
+        self.bytes: int = 0
+        self.__latest: Optional[bytes] = None
+        self.__deltas: deque = deque()
+
+    def __len__(self) -> int:
+        return len(self.__deltas) + (0 if self.__latest is None else 1)
+
+    def push(self, data: bytes) -> None:
+        if self.__latest is not None:
+            delta = zlib.compress(self.__xor(self.__latest, data), self.level)
+            self.__deltas.append((len(self.__latest), delta))
+            self.bytes += len(delta)
+            while self.bytes + len(data) > self.budget and self.__deltas:
+                self.bytes -= len(self.__deltas.popleft()[1])
+        self.__latest = data
+
+    def latest(self) -> Optional[bytes]:
+        return self.__latest
+
+    def peek(self, steps: int) -> Optional[bytes]:
+        """ Reconstruct the snapshot `steps` ticks back without dropping it """
+        if steps >= len(self):
+            return None
+        data = self.__latest
+        for index in range(1, steps + 1):
+            data = self.__apply(data, self.__deltas[-index])
+        return data
+
+    def rewind(self, steps: int = 1) -> Optional[bytes]:
+        """ Step back, discarding the newer snapshots """
+        steps = min(steps, len(self) - 1)
+        for _ in range(steps):
+            entry = self.__deltas.pop()
+            self.bytes -= len(entry[1])
+            self.__latest = self.__apply(self.__latest, entry)
+        return self.__latest
+
+    def clear(self) -> None:
+        self.__latest = None
+        self.__deltas.clear()
+        self.bytes = 0
+
+    def __apply(self, data: bytes, entry: tuple) -> bytes:
+        length, delta = entry
+        return self.__xor(data, zlib.decompress(delta))[:length]
+
+    def __xor(self, a: bytes, b: bytes) -> bytes:
+        size = max(len(a), len(b))
+        value = int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')
+        return value.to_bytes(size, 'little')
+
+
+def main():
+    """ Measure capture, restore and rewind costs on a headless session """
+    environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from renderer import SdlRenderer
+    from game import PlayState
+    from controls import AiInput, State
+
+    ticks = 3000
+    renderer = SdlRenderer(224, 260, 224, 260)
+    state = PlayState(renderer)
+    state.history = RewindBuffer()
+    input = AiInput()
+    rnd = Random(0)
+    capture = size = 0
+    for _ in range(ticks):
+        input.direction.update(rnd.choice((-1, 0, 1)), 0)
+        input.button.reset()
+        if rnd.random() < 0.2:
+            input.button.pressed(State.B)
+        state.update(33, input)
+        capture += state.snapshot.capture_time
+        size += state.snapshot.size
+
+    restore = 0
+    steps = len(state.history) - 1
+    for index in range(steps):
+        state.load(state.history.peek(index))
+        restore += state.snapshot.restore_time
+
+    print("snapshot bytes:   %.1f" % (size / ticks))
+    print("capture:          %.1f us" % (capture / ticks / 1000))
+    print("restore:          %.1f us" % (restore / steps / 1000))
+    print("rewind entries:   %d (%d bytes)" % (len(state.history), state.history.bytes))
+    print("bytes per delta:  %.1f" % (state.history.bytes / max(1, len(state.history) - 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import gc
+from os import environ, sysconf
+from sys import stdout
+from array import array
+from struct import Struct
+from random import Random
+from argparse import ArgumentParser
+from collections import Counter
+from time import perf_counter
+from typing import Optional
+from pygame.event import get
+from engine import Engine, StateStack
+from controls import AiInput, State
+from renderer import SdlRenderer
+from game import LoadState
+
+BUTTONS = [State.X, State.Y, State.A, State.B, State.R, State.L, State.START, State.SELECT]
+INPUT = Struct('<bbB')  # x, y, pressed buttons bitmask
+
+
+class RandomInput(AiInput):
+    """ Holds a random direction for a while and mashes the buttons """
+
+    def __init__(self, seed: int = 0):
+        super().__init__()
+        self.random = Random(seed)
+
+    def next(self) -> None:
+        if self.random.random() < 0.1:
+            self.direction.update(self.random.choice((-1, 0, 1)), 0)
+        self.button.reset()
+        if self.random.random() < 0.3:
+            self.button.pressed(State.B)
+        if self.random.random() < 0.05:
+            self.button.pressed(State.START)
+
+
+class ReplayInput(AiInput):
+    """ Plays a recorded input file back in a loop """
+
+    def __init__(self, path: str):
+        super().__init__()
+        with open(path, 'rb') as source:
+            self.frames = list(INPUT.iter_unpack(source.read()))
+        self.index = 0
+
+    def next(self) -> None:
+        x, y, mask = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        self.direction.update(x, y)
+        self.button.reset()
+        for bit, button in enumerate(BUTTONS):
+            if mask & (1 << bit):
+                self.button.pressed(button)
+
+
+def pack(input: AiInput) -> bytes:
+    mask = 0
+    for bit, button in enumerate(BUTTONS):
+        if input.button.is_pressed(button):
+            mask |= 1 << bit
+    return INPUT.pack(input.direction.x, input.direction.y, mask)
+
+
+def rss() -> int:
+    """ Resident set size in bytes, the peak one where /proc is missing """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * sysconf('SC_PAGE_SIZE')
+    except OSError:
+        from resource import getrusage, RUSAGE_SELF
+        return getrusage(RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: list, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Soak(object):
+    """
+    Runs the game headless and uncapped, sampling memory, object counts and
+    frame times, and decides whether memory grew or frame time drifted.
+    """
+
+    def __init__(self, input: AiInput, window: int = 10000, warmup: int = 3, output=stdout):
+        """
+        Parameters
+        ----------
+        input : AiInput
+            A `RandomInput` or `ReplayInput`, advanced once per frame.
+        window : int
+            Frames between two samples.
+        warmup : int
+            Samples ignored before the baseline is taken.
+        """
+        self.input = input
+        self.window = window
+        self.warmup = warmup
+        self.output = output
+        self.record = None
+        self.samples: list = []
+        self.objects: Optional[Counter] = None
+        self.baseline: Optional[Counter] = None
+
+    def run(self, frames: int) -> None:
+        renderer = SdlRenderer(224, 260, 224, 260)
+        stack = StateStack()
+        stack.push(LoadState(renderer))
+        times = array('d', bytes(8 * self.window))
+        time = 1000 // Engine.FPS
+
+        for frame in range(frames):
+            start = perf_counter()
+            self.input.next()
+            state = stack.top()
+            for event in get():
+                if event.type == Engine.GAME_EVENT:
+                    state.on_event(event)
+            state.update(time, self.input)
+            renderer.cls()
+            state.draw(renderer)
+            renderer.draw_to_screen()
+            times[frame % self.window] = perf_counter() - start
+            if self.record is not None:
+                self.record.write(pack(self.input))
+            if (frame + 1) % self.window == 0:
+                self.__sample(frame + 1, sorted(times))
+        while len(stack) > 0:
+            stack.pop()
+
+    def failures(self, growth: int, drift: float, objects: int) -> list:
+        """
+        Parameters
+        ----------
+        growth : int
+            Bytes of RSS the session may gain after the warmup.
+        drift : float
+            Allowed ratio between the last and the first p95 frame time.
+        objects : int
+            Instances any single type may gain after the warmup.
+        """
+        if len(self.samples) <= self.warmup + 1:
+            return []
+        first = self.samples[self.warmup]
+        last = self.samples[-1]
+        failures = []
+        if last[1] - first[1] > growth:
+            failures.append("RSS grew by %d KiB" % ((last[1] - first[1]) // 1024))
+        if last[3] > first[3] * drift:
+            failures.append("p95 frame time drifted from %.3f to %.3f ms" % (first[3], last[3]))
+        if self.baseline is not None:
+            for name, count in (self.objects - self.baseline).most_common(5):
+                if count > objects:
+                    failures.append("%d more %s objects" % (count, name))
+        return failures
+
+    def __sample(self, frame: int, times: list) -> None:
+        p50 = percentile(times, 0.5) * 1000
+        p95 = percentile(times, 0.95) * 1000
+        p99 = percentile(times, 0.99) * 1000
+        memory = rss()
+        self.samples.append((frame, memory, p50, p95, p99))
+        self.objects = Counter(type(item).__name__ for item in gc.get_objects())
+        if len(self.samples) == self.warmup + 1:
+            self.baseline = self.objects
+        self.output.write("%10d frames  rss %8d KiB  objects %8d  p50 %.3f  p95 %.3f  p99 %.3f ms\n" % (
+            frame, memory // 1024, sum(self.objects.values()), p50, p95, p99))
+        self.output.flush()
+
+
+def main():
+    parser = ArgumentParser(description="Headless soak test")
+    parser.add_argument('--frames', type=int, default=1000000, help="frames to run")
+    parser.add_argument('--window', type=int, default=10000, help="frames between samples")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random input")
+    parser.add_argument('--replay', metavar='FILE', help="play back recorded input instead of random")
+    parser.add_argument('--record', metavar='FILE', help="record the input of this session")
+    parser.add_argument('--growth', type=int, default=16, help="allowed RSS growth in MiB")
+    parser.add_argument('--drift', type=float, default=1.5, help="allowed p95 frame time ratio")
+    parser.add_argument('--objects', type=int, default=1000, help="allowed growth of any object type")
+    args = parser.parse_args()
+
+    environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    input = ReplayInput(args.replay) if args.replay else RandomInput(args.seed)
+    soak = Soak(input, args.window)
+    if args.record:
+        soak.record = open(args.record, 'wb')
+    soak.run(args.frames)
+    if soak.record is not None:
+        soak.record.close()
+
+    failures = soak.failures(args.growth << 20, args.drift, args.objects)
+    for failure in failures:
+        print("FAIL: " + failure)
+    if failures:
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from re import L
+from typing import Optional
 from pygame.sprite import Sprite
 from pygame import Rect, Vector2
 from pygame.surface import Surface
@@ -7,6 +8,8 @@ from renderer import Renderer
 from action import Frame, Action
 from controls import Input, State
 from timer import Timer
+from waves import Wave
+from manifest import SPRITES
 
 class GameObject(Sprite):
     def spawn(self) -> None:
@@ -26,13 +29,15 @@ class GameObject(Sprite):
 
 class ShipBullet(GameObject):
     SPRITE = 0
+    BULLET = SPRITES.id('ship.bullet')
+    EXPLOSION = SPRITES.id('ship.bullet.explosion')
 
     def __init__(self, boundary: Rect, position: tuple, *groups) -> None:
         super().__init__(*groups)
         self.__is_alive = True
         self.__explode = False
         self.rect = Rect(position[0], position[1], 1, 4)
-        self.frame = Frame(self.rect, Rect(55, 53, 1, 4), 6)
+        self.frame = Frame(self.rect, SPRITES.region(self.BULLET), 6)
         self.input = None
         self.speed = 6
         self.boundary = boundary
@@ -57,7 +62,7 @@ class ShipBullet(GameObject):
         if new_position <= self.boundary.top and self.__explode is False:
             new_position = self.boundary.top
             self.rect = Rect(self.rect.left - 4, self.rect.top, 8, 8)
-            self.frame = Frame(self.rect, Rect(58, 49, 8, 8), 6)
+            self.frame = Frame(self.rect, SPRITES.region(self.EXPLOSION), 6)
             self.__explode = True
             self.timer = Timer(180)
 
@@ -68,21 +73,41 @@ class ShipBullet(GameObject):
         return self.__is_alive
 
     def draw(self, renderer: Renderer) -> None:
-        renderer.draw(self.SPRITE, self.frame.src, self.frame.collision)
+        renderer.draw(self.SPRITE, self.frame.src, self.frame.collision, key=self)
+
+    def save(self) -> tuple:
+        counter = -1 if self.timer is None else self.timer.counter
+        return (self.rect.left, self.rect.top, self.rect.width, self.rect.height,
+                counter, self.__is_alive, self.__explode)
+
+    def restore(self, values: tuple) -> None:
+        left, top, width, height, counter, self.__is_alive, self.__explode = values
+        self.rect = Rect(left, top, width, height)
+        if self.__explode is True:
+            self.frame = Frame(self.rect, SPRITES.region(self.EXPLOSION), 6)
+        else:
+            self.frame = Frame(self.rect, SPRITES.region(self.BULLET), 6)
+        self.timer = None
+        if counter >= 0:
+            self.timer = Timer(180)
+            self.timer.counter = counter
 
 class Ship(GameObject):
     SPRITE = 0
+    SHIP = SPRITES.id('ship')
 
     def __init__(self, boundary: Rect,  *groups) -> None:
         super().__init__(*groups)
         self.__is_alive = True
         self.rect = Rect(18, 220, 13, 8)
-        self.frame = Frame(self.rect, Rect(3, 49, 13, 8), 6)
+        self.frame = Frame(self.rect, SPRITES.region(self.SHIP), 6)
         self.input = None
         self.vel = Vector2(0, 0)
         self.speed = 2
         self.boundary = boundary
         self.bullets = []
+        self.fired = False
+        self.shots = 0
         self.__score = 0
 
     def set_input(self, input: Input) -> None:
@@ -92,6 +117,7 @@ class Ship(GameObject):
         return self.__score
 
     def update(self, time: int) -> None:
+        self.fired = False
         if self.input is None:
             return
 
@@ -112,10 +138,21 @@ class Ship(GameObject):
     def fire(self) -> None:
         bullet = ShipBullet(self.boundary, (self.rect.left + 6, self.rect.top))
         self.bullets.append(bullet)
+        self.fired = True
+        self.shots += 1
 
     def spawn(self) -> None:
         self.__is_alive = True
 
+    def reset(self) -> None:
+        self.rect.topleft = (18, 220)
+        self.frame.collision = self.rect
+        self.bullets.clear()
+        self.fired = False
+        self.shots = 0
+        self.__score = 0
+        self.__is_alive = True
+
     def is_alive(self) -> bool:
         return self.__is_alive
 
@@ -127,18 +164,34 @@ class Ship(GameObject):
                 return True
 
     def draw(self, renderer: Renderer) -> None:
-        renderer.draw(self.SPRITE, self.frame.src, self.frame.collision)
+        renderer.draw(self.SPRITE, self.frame.src, self.frame.collision, key=self)
         for bullet in self.bullets:
             bullet.draw(renderer)
 
+    def save(self) -> tuple:
+        return (self.rect.left, self.rect.top, self.__score, self.shots, self.__is_alive)
+
+    def restore(self, values: tuple) -> None:
+        left, top, self.__score, self.shots, self.__is_alive = values
+        self.rect.topleft = (left, top)
+        self.frame.collision = self.rect
+
     def __update_bullets(self, time: int) -> None:
-        for bullet in self.bullets:
+        for index in range(len(self.bullets) - 1, -1, -1):
+            bullet = self.bullets[index]
             bullet.update(time)
             if bullet.is_alive() is False:
-                self.bullets.remove(bullet)
+                del self.bullets[index]
 
 class Alien(GameObject):
     SPRITE = 0
+    """ Walking frames of each alien type """
+    FRAMES = {
+        '1': (SPRITES.id('alien1.a'), SPRITES.id('alien1.b')),
+        '2': (SPRITES.id('alien2.a'), SPRITES.id('alien2.b')),
+        '3': (SPRITES.id('alien3.a'), SPRITES.id('alien3.b')),
+    }
+    EXPLOSION = SPRITES.id('alien.explosion')
 
     def __init__(self, boundary: Rect, type: str, pos: Vector2, *groups) -> None:
         self.boundary = boundary
@@ -146,6 +199,7 @@ class Alien(GameObject):
         self.dive = 8
         self.__is_alive = True
         self.type = type
+        self.origin = Vector2(pos)
         self.action = self.__create_action(type, pos)
         self.frame = self.action.next_frame()
         self.dir = 1
@@ -153,14 +207,16 @@ class Alien(GameObject):
         self.walk_timer = 0
         self.speed_delay = 1000
         self.changed = False
+        self.stepped = False
         self.frame_index = 0
         self.__explode = False
         self.__explode_timer = 0
 
     def update(self, time: int) -> None:
-        self.walk_timer += time
+        self.stepped = False
         if self.__is_alive is False:
             return
+        self.walk_timer += time
 
         if self.__explode_timer >= 90:
             self.__is_alive = False
@@ -178,6 +234,7 @@ class Alien(GameObject):
             return
 
         self.walk_timer = 0
+        self.stepped = True
         if self.__explode is False:
             self.frame_index = 1 if self.frame_index == 0 else 0
             self.frame = self.action.frames[self.frame_index]
@@ -209,6 +266,22 @@ class Alien(GameObject):
     def spawn(self) -> None:
         self.__is_alive = True
 
+    def reset(self) -> None:
+        """ Back to the starting place, alive, without reallocating anything """
+        self.rect.topleft = self.origin
+        self.dir = 1
+        self.frame_index = 0
+        self.frame = self.action.frames[0]
+        self.walk_timer = 0
+        self.speed_delay = 1000
+        self.changed = False
+        self.stepped = False
+        self.__is_alive = True
+        self.__explode = False
+        self.__explode_timer = 0
+        for frame in self.action.frames:
+            frame.collision.topleft = self.rect.topleft
+
     def is_alive(self) -> bool:
         return self.__is_alive
 
@@ -223,7 +296,21 @@ class Alien(GameObject):
         return self.rect.colliderect(other.rect)
 
     def draw(self, renderer: Renderer) -> None:
-        renderer.draw(self.SPRITE, self.frame.src, self.frame.collision)
+        renderer.draw(self.SPRITE, self.frame.src, self.frame.collision, key=self)
+
+    def save(self) -> tuple:
+        return (self.rect.left, self.rect.top, self.dir, self.frame_index,
+                self.walk_timer, self.speed_delay, self.__explode_timer,
+                self.changed, self.__is_alive, self.__explode)
+
+    def restore(self, values: tuple) -> None:
+        (left, top, self.dir, self.frame_index, self.walk_timer,
+         self.speed_delay, self.__explode_timer, self.changed,
+         self.__is_alive, self.__explode) = values
+        self.rect.topleft = (left, top)
+        self.frame = self.action.frames[self.frame_index]
+        for frame in self.action.frames:
+            frame.collision.topleft = self.rect.topleft
 
     def points(self) -> int:
         if self.type == '1':
@@ -236,43 +323,40 @@ class Alien(GameObject):
 
 
     def __create_action(self, type: str, pos: Vector2) -> Action:
-        if type == '1':
-            return Action([
-                Frame(Rect(pos.x, pos.y, 8, 8), Rect(5, 1, 8, 8), 1),
-                Frame(Rect(pos.x, pos.y, 8, 8), Rect(5, 11, 8, 8), 1),
-                Frame(Rect(pos.x, pos.y, 8, 8), Rect(56, 1, 13, 8), 1)
-            ])
-        elif type == '2':
-            return Action([
-                Frame(Rect(pos.x, pos.y, 11, 8), Rect(22, 1, 11, 8), 1),
-                Frame(Rect(pos.x, pos.y, 11, 8), Rect(22, 11, 11, 8), 1),
-                Frame(Rect(pos.x, pos.y, 11, 8), Rect(56, 1, 13, 8), 1)
-            ])
-        elif type == '3':
-            return Action([
-                Frame(Rect(pos.x, pos.y, 12, 8), Rect(39, 1, 12, 8), 1),
-                Frame(Rect(pos.x, pos.y, 12, 8), Rect(39, 11, 12, 8), 1),
-                Frame(Rect(pos.x, pos.y, 12, 8), Rect(56, 1, 13, 8), 1)
-            ])
+        first, second = self.FRAMES[type]
+        _, _, width, height = SPRITES.region(first)
+        return Action([
+            Frame(Rect(pos.x, pos.y, width, height), SPRITES.region(first), 1),
+            Frame(Rect(pos.x, pos.y, width, height), SPRITES.region(second), 1),
+            Frame(Rect(pos.x, pos.y, width, height), SPRITES.region(self.EXPLOSION), 1)
+        ])
 
 class AlienGroup(GameObject):
-    def __init__(self, boundary: Rect, type: str, pos: Vector2, *groups) -> None:
+    def __init__(self, boundary: Rect, type: str, pos: Vector2, columns: int = 11, spacing: int = 16, *groups) -> None:
         self.aliens = []
         self.changed = False
+        self.stepped = False
         self.__to_remove = []
-        for i in range(0, 11):
-            new_pos = Vector2(pos.x + (16 * i), pos.y)
+        for i in range(0, columns):
+            new_pos = Vector2(pos.x + (spacing * i), pos.y)
             self.aliens.append(Alien(boundary, type, new_pos))
+        """ Every alien of the group, including the dead ones, in column order """
+        self.roster = list(self.aliens)
 
     def update(self, time: int) -> None:
         self.changed = False
+        self.stepped = False
 
         for alien in self.aliens:
             alien.update(time)
+            if alien.stepped is True:
+                self.stepped = True
 
-        for alien in self.__to_remove:
+        """ Walk backwards, so removing does not skip the next alien """
+        for index in range(len(self.__to_remove) - 1, -1, -1):
+            alien = self.__to_remove[index]
             if alien.is_alive() is False:
-                self.__to_remove.remove(alien)
+                del self.__to_remove[index]
                 self.aliens.remove(alien)
 
         self.__has_reached_boundaries()
@@ -311,37 +395,51 @@ class AlienGroup(GameObject):
         for alien in self.aliens:
             alien.speed_delay = delay
 
+    def reset(self) -> None:
+        self.changed = False
+        self.stepped = False
+        self.aliens[:] = self.roster
+        self.__to_remove.clear()
+        for alien in self.roster:
+            alien.reset()
+
+    def restore(self, changed: bool) -> None:
+        """
+        Rebuild the living and exploding lists after the aliens of the
+        roster have been restored.
+        """
+        self.changed = changed
+        self.aliens = [alien for alien in self.roster if alien.is_alive()]
+        self.__to_remove = [alien for alien in self.aliens if alien.is_exploding()]
+
 
 class AllAliens(GameObject):
-    def __init__(self, boundary: Rect, *groups) -> None:
+    def __init__(self, boundary: Rect, wave: Optional[Wave] = None, *groups) -> None:
+        self.wave = wave if wave is not None else Wave()
+        self.stepped = False
         self.groups = []
-        self.groups.append(AlienGroup(boundary, '1', Vector2(34, 68)))
-        self.groups.append(AlienGroup(boundary, '2', Vector2(33, 83)))
-        self.groups.append(AlienGroup(boundary, '2', Vector2(33, 98)))
-        self.groups.append(AlienGroup(boundary, '3', Vector2(32, 113)))
-        self.groups.append(AlienGroup(boundary, '3', Vector2(32, 128)))
+        x, y = self.wave.origin
+        for index, row in enumerate(self.wave.rows):
+            pos = Vector2(x + row.get('offset', 0), y + self.wave.spacing[1] * index)
+            self.groups.append(AlienGroup(boundary, row['type'], pos, self.wave.columns, self.wave.spacing[0]))
+        self.__delay = None
+        self.update_speed(self.wave.delay)
 
     def update(self, time: int) -> None:
+        self.stepped = False
         for group in self.groups:
             group.update(time)
+            if group.stepped is True:
+                self.stepped = True
 
         reached_boundaries = self.__has_reached_boundaries()
         if reached_boundaries:
             for group in self.groups:
                 group.toggle()
 
-        count = self.count()
-
-        if count < 45:
-            self.update_speed(700)
-        elif count < 35:
-            self.update_speed(200)
-        elif count < 25:
-            self.update_speed(100)
-        elif count < 15:
-            self.update_speed(50)
-        elif count < 5:
-            self.update_speed(10)
+        delay = self.wave.speed(self.count())
+        if delay != self.__delay:
+            self.update_speed(delay)
 
     def __has_reached_boundaries(self) -> bool:
         for group in self.groups:
@@ -364,65 +462,130 @@ class AllAliens(GameObject):
             group.draw(renderer)
 
     def update_speed(self, delay: int) -> None:
+        self.__delay = delay
         for group in self.groups:
             group.update_speed(delay)
 
+    def reset(self) -> None:
+        self.stepped = False
+        for group in self.groups:
+            group.reset()
+        self.update_speed(self.wave.delay)
+
+    def reached(self, line: int) -> bool:
+        """ Whether an alive alien has come down to the `line` """
+        for group in self.groups:
+            for alien in group.aliens:
+                if alien.rect.bottom >= line:
+                    return True
+        return False
+
     def count(self) -> int:
         count = 0
         for group in self.groups:
             count += group.count()
         return count
 
+class MysteryShip(GameObject):
+    SPRITE = 0
+    SHIP = SPRITES.id('mystery')
+    EXPLOSION = SPRITES.id('mystery.explosion')
+    EVENT = 'mystery'
+    INTERVAL = 25600  # milliseconds between two ships, like the arcade
+    """ Points of the arcade, indexed by the player's shot count """
+    SCORES = (100, 50, 50, 100, 150, 100, 100, 50, 300, 100, 100, 100, 50, 150, 100)
+
+    def __init__(self, boundary: Rect, *groups) -> None:
+        super().__init__(*groups)
+        self.boundary = boundary
+        self.rect = Rect(boundary.left, 44, 16, 8)
+        self.frame = Frame(self.rect, SPRITES.region(self.SHIP), 6)
+        self.speed = 1
+        self.dir = 1
+        self.__points = 0
+        self.__is_alive = False
+        self.__explode = False
+        self.__explode_timer = 0
+
+    def spawn(self, direction: int = 1) -> None:
+        self.dir = direction
+        self.__points = 0
+        self.rect.width = 16
+        if direction > 0:
+            self.rect.left = self.boundary.left
+        else:
+            self.rect.right = self.boundary.right
+        self.frame.src = SPRITES.region(self.SHIP)
+        self.__is_alive = True
+        self.__explode = False
+        self.__explode_timer = 0
+
+    def reset(self) -> None:
+        self.__is_alive = False
+        self.__explode = False
+        self.__explode_timer = 0
+
+    def update(self, time: int) -> None:
+        if self.__is_alive is False:
+            return
+
+        if self.__explode is True:
+            self.__explode_timer += time
+            if self.__explode_timer >= 500:
+                self.reset()
+            return
+
+        self.rect.left += self.speed * self.dir
+        if self.rect.left < self.boundary.left or self.rect.right > self.boundary.right:
+            self.__is_alive = False
+
+    def is_alive(self) -> bool:
+        return self.__is_alive
+
+    def is_exploding(self) -> bool:
+        return self.__explode
+
+    def explode(self) -> None:
+        """ The explosion is wider than the ship, keep it centred """
+        self.__explode = True
+        self.rect.inflate_ip(8, 0)
+        self.frame.src = SPRITES.region(self.EXPLOSION)
+
+    def points(self) -> int:
+        return self.__points
+
+    def collide(self, other: 'GameObject') -> bool:
+        """ `other` is the `Ship`, its shot count at the hit picks the points """
+        if self.__is_alive is False or self.__explode is True:
+            return False
+        self.__points = self.SCORES[other.shots % len(self.SCORES)]
+        if other.collide(self):
+            self.explode()
+            return True
+        return False
+
+    def draw(self, renderer: Renderer) -> None:
+        if self.__is_alive is True:
+            renderer.draw(self.SPRITE, self.frame.src, self.rect, key=self)
+
+    def save(self) -> tuple:
+        return (self.rect.left, self.rect.width, self.dir, self.__points,
+                self.__explode_timer, self.__is_alive, self.__explode)
+
+    def restore(self, values: tuple) -> None:
+        (self.rect.left, self.rect.width, self.dir, self.__points,
+         self.__explode_timer, self.__is_alive, self.__explode) = values
+        region = self.EXPLOSION if self.__explode is True else self.SHIP
+        self.frame.src = SPRITES.region(region)
+
 class Letter(Sprite):
     SPRITE = 0
+    GLYPHS = SPRITES.prefixed('glyph.')
 
-    def __init__(self, position: Rect, text: str, *groups) -> None:
+    def __init__(self, position: Rect, text: str, fill: int = 5, *groups) -> None:
         self.position = position
         self.text = text
-        self.sources = {
-            'A': Rect(1, 69, 8, 8),
-            'B': Rect(11, 69, 8, 8),
-            'C': Rect(21, 69, 8, 8),
-            'D': Rect(31, 69, 8, 8),
-            'E': Rect(41, 69, 8, 8),
-            'F': Rect(51, 69, 8, 8),
-            'G': Rect(61, 69, 8, 8),
-            'H': Rect(71, 69, 8, 8),
-            'I': Rect(1, 79, 8, 8),
-            'J': Rect(11, 79, 8, 8),
-            'K': Rect(21, 79, 8, 8),
-            'L': Rect(31, 79, 8, 8),
-            'M': Rect(41, 79, 8, 8),
-            'N': Rect(51, 79, 8, 8),
-            'O': Rect(61, 79, 8, 8),
-            'P': Rect(71, 79, 8, 8),
-            'Q': Rect(1, 89, 8, 8),
-            'R': Rect(11, 89, 8, 8),
-            'S': Rect(21, 89, 8, 8),
-            'T': Rect(31, 89, 8, 8),
-            'U': Rect(41, 89, 8, 8),
-            'V': Rect(51, 89, 8, 8),
-            'W': Rect(61, 89, 8, 8),
-            'X': Rect(71, 89, 8, 8),
-            'Y': Rect(1, 99, 8, 8),
-            'Z': Rect(11, 99, 8, 8),
-            '0': Rect(21, 99, 8, 8),
-            '1': Rect(31, 99, 8, 8),
-            '2': Rect(41, 99, 8, 8),
-            '3': Rect(51, 99, 8, 8),
-            '4': Rect(61, 99, 8, 8),
-            '5': Rect(71, 99, 8, 8),
-            '6': Rect(1, 109, 8, 8),
-            '7': Rect(11, 109, 8, 8),
-            '8': Rect(21, 109, 8, 8),
-            '9': Rect(31, 109, 8, 8),
-            '<': Rect(41, 109, 8, 8),
-            '>': Rect(51, 109, 8, 8),
-            '=': Rect(61, 109, 8, 8),
-            '*': Rect(71, 109, 8, 8),
-            '?': Rect(1, 119, 8, 8),
-            '-': Rect(11, 119, 8, 8),
-        };
+        self.fill = fill
 
     def update(self, time: int):
         pass
@@ -432,9 +595,10 @@ class Letter(Sprite):
 
     def draw(self, renderer: Renderer) -> None:
         word = str(self.text)
-        word = word.zfill(5)
-        chars = [char for char in word]
-        for index, char in enumerate(chars):
-            letter_on_sheet = self.sources.get(char)
-            where_to_put = Rect(self.position.left + (index * 8), self.position.top, 8, 8)
-            renderer.draw(self.SPRITE, letter_on_sheet, where_to_put)
+        word = word.zfill(self.fill)
+        left, top = self.position.topleft
+        for index, char in enumerate(word):
+            letter_on_sheet = self.GLYPHS.get(char)
+            if letter_on_sheet is None:
+                continue
+            renderer.draw(self.SPRITE, letter_on_sheet, (left + index * 8, top))
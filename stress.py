@@ -0,0 +1,72 @@
+from os import environ
+from argparse import ArgumentParser
+from time import perf_counter
+from pygame import Rect
+from engine import Engine
+from controls import AiInput, State
+from renderer import SdlRenderer
+from sprites import Ship, AllAliens
+from manifest import SPRITES
+from waves import Wave, load, stress
+
+SIZES = [(5, 11), (10, 22), (20, 44), (30, 66), (50, 100), (100, 100), (100, 200)]
+
+
+def measure(renderer: SdlRenderer, wave: Wave, ticks: int) -> tuple:
+    """ Average milliseconds per tick spent updating, colliding and drawing """
+    width, height = renderer.screen()
+    boundary = Rect(9, 38, width - 18, height - 56)
+    aliens = AllAliens(boundary, wave)
+    ship = Ship(boundary)
+    input = AiInput()
+    input.button.pressed(State.B)
+    ship.set_input(input)
+
+    update = collide = draw = 0.0
+    for _ in range(ticks):
+        start = perf_counter()
+        ship.update(1000 // Engine.FPS)
+        aliens.update(1000 // Engine.FPS)
+        middle = perf_counter()
+        aliens.collide(ship)
+        end = perf_counter()
+        renderer.cls()
+        ship.draw(renderer)
+        aliens.draw(renderer)
+        update += middle - start
+        collide += end - middle
+        draw += perf_counter() - end
+    return (update * 1000 / ticks, collide * 1000 / ticks, draw * 1000 / ticks)
+
+
+def main():
+    """
+    Spawn larger and larger formations on an enlarged playfield and report
+    the per-tick cost, to find where the design stops fitting in a frame.
+    """
+    parser = ArgumentParser(description="Alien formation stress test")
+    parser.add_argument('--wave', help="measure this wave file instead of the generated formations")
+    parser.add_argument('--ticks', type=int, default=60, help="ticks measured per formation")
+    args = parser.parse_args()
+
+    environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    waves = [load(args.wave)] if args.wave else [stress(rows, columns) for rows, columns in SIZES]
+    width = max(wave.origin[0] + wave.width() for wave in waves) + 64
+    height = max(wave.origin[1] + wave.spacing[1] * len(wave.rows) for wave in waves) + 64
+    renderer = SdlRenderer(width, height, 224, 260)
+    renderer.register_image(Ship.SPRITE, SPRITES.image, (0, 0, 0), False)
+
+    budget = 1000 / Engine.FPS
+    print("playfield %dx%d, frame budget %.1f ms" % (width, height, budget))
+    print("%8s %10s %10s %10s %10s %10s" % ("aliens", "update ms", "collide ms", "draw ms", "total ms", "us/alien"))
+    for wave in waves:
+        update, collide, draw = measure(renderer, wave, args.ticks)
+        total = update + collide + draw
+        print("%8d %10.2f %10.2f %10.2f %10.2f %10.2f%s" % (
+            wave.size(), update, collide, draw, total, total * 1000 / wave.size(),
+            "  over budget" if total > budget else ""
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+from bisect import bisect_right
+
+
+class Wave(object):
+    """
+    Layout and tempo of an alien formation.
+
+    Waves are stored as JSON files (see `assets/waves/classic.json`):
+
+    ==========  =====================================================
+    `origin`    x, y of the first alien of the first row
+    `columns`   aliens per row
+    `spacing`   x, y distance between neighbouring aliens
+    `rows`      one entry per row, top first: alien `type` ('1', '2'
+                or '3') and an x `offset` from the origin
+    `delay`     milliseconds between steps of the full formation
+    `tempo`     [count, delay] pairs: once fewer than `count` aliens
+                are alive they step every `delay` milliseconds
+    ==========  =====================================================
+
+    The defaults describe the arcade formation.
+    """
+
+    def __init__(
+        self,
+        origin: tuple = (32, 68),
+        columns: int = 11,
+        spacing: tuple = (16, 15),
+        rows: list = None,
+        delay: int = 1000,
+        tempo: list = None
+    ):
+        self.origin = tuple(origin)
+        self.columns = columns
+        self.spacing = tuple(spacing)
+        self.rows = rows if rows is not None else [
+            {'type': '1', 'offset': 2},
+            {'type': '2', 'offset': 1},
+            {'type': '2', 'offset': 1},
+            {'type': '3', 'offset': 0},
+            {'type': '3', 'offset': 0},
+        ]
+        self.delay = delay
+        tempo = sorted(tempo if tempo is not None else [[45, 700]])
+        self.__counts = [count for count, _ in tempo]
+        self.__delays = [delay for _, delay in tempo] + [self.delay]
+
+    def size(self) -> int:
+        return self.columns * len(self.rows)
+
+    def width(self) -> int:
+        return self.spacing[0] * self.columns
+
+    def speed(self, count: int) -> int:
+        """ Step delay once `count` aliens are alive """
+        return self.__delays[bisect_right(self.__counts, count)]
+
+
+def load(path: str) -> Wave:
+    with open(path) as source:
+        data = json.load(source)
+    return Wave(
+        data.get('origin', (32, 68)),
+        data.get('columns', 11),
+        data.get('spacing', (16, 15)),
+        data.get('rows'),
+        data.get('delay', 1000),
+        data.get('tempo')
+    )
+
+
+def stress(rows: int, columns: int, delay: int = 0) -> Wave:
+    """
+    A formation of `rows` x `columns` aliens cycling the three types, which
+    by default steps on every tick.
+    """
+    return Wave(
+        (32, 68),
+        columns,
+        (16, 15),
+        [{'type': '123'[row % 3], 'offset': 0} for row in range(rows)],
+        delay,
+        []
+    )